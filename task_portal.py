@@ -2,9 +2,52 @@ import streamlit as st
 import gspread
 import os
 import json
-from oauth2client.service_account import ServiceAccountCredentials
+import hashlib
+import hmac
+import random
+import secrets
+import tempfile
+from google.auth.transport.requests import Request
+from google.oauth2.service_account import Credentials
 from datetime import datetime, date, time
-import uuid
+from collections import Counter, defaultdict
+from functools import lru_cache, wraps
+from time import sleep
+
+TASK_COLUMNS = ["id", "title", "description", "assigned_to", "created_by", "status", "timestamp", "deadline"]
+USER_COLUMNS = ["username", "role", "password"]
+PASSWORD_HASH_ITERATIONS = 200_000
+RETRYABLE_STATUS_CODES = (429, 500, 503)
+# App-specific by default so another user's file in the shared temp dir can't shadow ours
+TASKS_SNAPSHOT_DIR = os.getenv("TASKS_SNAPSHOT_DIR", os.path.join(os.path.expanduser("~"), ".cache", "task-portal"))
+TASKS_SNAPSHOT_PATH = os.path.join(TASKS_SNAPSHOT_DIR, "tasks_snapshot.json")
+TASKS_PER_PAGE = 25
+# Writes made through the app clear these caches; the TTLs only bound how long
+# edits made directly in the spreadsheet take to show up
+TASKS_CACHE_TTL = 60
+USERS_CACHE_TTL = 300
+
+CUSTOM_CSS = """
+<style>
+.stContainer > div {
+    border: 1px solid #e0e0e0;
+    border-radius: 10px;
+    padding: 15px;
+    margin: 10px 0;
+    background-color: #fafafa;
+}
+.stButton > button {
+    width: 100%;
+}
+div[data-baseweb="radio"] {
+    flex-direction: row;
+    gap: 1rem;
+}
+div[data-baseweb="radio"] > label {
+    margin-right: 10px;
+}
+</style>
+"""
 
 # Configure page
 st.set_page_config(
@@ -21,7 +64,8 @@ def initialize_session_state():
         "role": None,
         "pending_task_additions": [],
         "pending_task_updates": {},
-        "pending_task_deletions": [],
+        "pending_task_deletions": set(),
+        "logout_save_failed": False,
         # Form-specific session state keys
         "coord_task_title_form": "",
         "coord_task_desc_form": "",
@@ -41,6 +85,22 @@ def initialize_session_state():
 # Initialize session state
 initialize_session_state()
 
+def retry_api(fn=None, *, status_codes=RETRYABLE_STATUS_CODES, max_attempts=5):
+    """Retry a Sheets API call with exponential backoff and jitter on transient errors"""
+    if fn is None:
+        return lambda f: retry_api(f, status_codes=status_codes, max_attempts=max_attempts)
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        for attempt in range(max_attempts):
+            try:
+                return fn(*args, **kwargs)
+            except gspread.exceptions.APIError as e:
+                if e.response.status_code not in status_codes or attempt == max_attempts - 1:
+                    raise
+                sleep(2 ** attempt + random.random())
+    return wrapper
+
 @st.cache_resource
 def get_gsheet_client():
     """Initialize Google Sheets client with caching"""
@@ -54,185 +114,387 @@ def get_gsheet_client():
         st.error("Invalid JSON in GOOGLE_CREDENTIALS_JSON. Please check the format.")
         st.stop()
 
-    scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
+    scope = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
+    creds = Credentials.from_service_account_info(creds_dict, scopes=scope)
+    # Fetch the access token now so the first Sheets request doesn't pay for the exchange
+    creds.refresh(Request())
     return gspread.authorize(creds)
 
-@st.cache_data(ttl=10)
-def load_users():
-    """Load users with caching"""
-    try:
-        gc = get_gsheet_client()
-        user_sheet = gc.open("Task-management").worksheet("users")
-        return user_sheet.get_all_records()
-    except Exception as e:
-        st.error(f"Error loading users: {e}")
+@st.cache_resource
+@retry_api
+def get_spreadsheet():
+    """Open the Task-management spreadsheet once and reuse the handle"""
+    gc = get_gsheet_client()
+    return gc.open("Task-management")
+
+@st.cache_resource
+def get_worksheets():
+    """Open the tasks and users worksheets once and reuse the handles"""
+    # get_spreadsheet() retries on its own; only the worksheet lookups are retried here
+    spreadsheet = get_spreadsheet()
+    return retry_api(spreadsheet.worksheet)("tasks"), retry_api(spreadsheet.worksheet)("users")
+
+def handle_sheet_error(e):
+    """Drop cached client and worksheet handles on authentication errors"""
+    if isinstance(e, gspread.exceptions.APIError) and e.response.status_code in (401, 403):
+        get_worksheets.clear()
+        get_spreadsheet.clear()
+        get_gsheet_client.clear()
+
+def rows_to_records(values, expected_columns):
+    """Convert raw sheet values (header row first) into a list of dicts"""
+    if not values:
         return []
+    columns = values[0] + [col for col in expected_columns if col not in values[0]]
+    width = len(columns)
+    return [dict(zip(columns, row + [''] * (width - len(row)))) for row in values[1:]]
+
+def save_tasks_snapshot(tasks):
+    """Atomically write the latest tasks to disk as a fallback for failed reads"""
+    tmp_path = None
+    try:
+        os.makedirs(TASKS_SNAPSHOT_DIR, mode=0o700, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=TASKS_SNAPSHOT_DIR, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(tasks, f)
+        os.replace(tmp_path, TASKS_SNAPSHOT_PATH)
+        tmp_path = None
+    except (OSError, TypeError, ValueError):
+        pass
+    finally:
+        # Don't leave a half-written temp file behind when the dump or rename fails
+        if tmp_path is not None:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+def load_tasks_snapshot():
+    """Read the last tasks snapshot from disk, or None if there isn't one"""
+    try:
+        with open(TASKS_SNAPSHOT_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+@st.cache_data(ttl=USERS_CACHE_TTL)
+def load_users():
+    """Load users with caching; errors propagate so a failed read is never cached as 'no users'"""
+    _, user_sheet = get_worksheets()
+    return rows_to_records(retry_api(user_sheet.get_all_values)(), USER_COLUMNS)
+
+@st.cache_data(ttl=USERS_CACHE_TTL)
+def users_by_name():
+    """Index users by username for O(1) login lookups"""
+    return {u["username"]: u for u in load_users()}
+
+@st.cache_data(ttl=TASKS_CACHE_TTL)
+def fetch_tasks():
+    """Read all tasks; errors propagate so a failed read is never cached"""
+    task_sheet, _ = get_worksheets()
+    tasks = rows_to_records(retry_api(task_sheet.get_all_values)(), TASK_COLUMNS)
+    save_tasks_snapshot(tasks)
+    return tasks
+
+@st.cache_data(ttl=TASKS_CACHE_TTL)
+def fetch_all():
+    """Read tasks and users together in a single batchGet request; errors propagate uncached"""
+    response = retry_api(get_spreadsheet().values_batch_get)(["tasks", "users"])
+    task_range, user_range = response["valueRanges"]
+    tasks = rows_to_records(task_range.get("values", []), TASK_COLUMNS)
+    save_tasks_snapshot(tasks)
+    return tasks, rows_to_records(user_range.get("values", []), USER_COLUMNS)
 
-@st.cache_data(ttl=5)
 def load_tasks():
-    """Load tasks with caching"""
+    """Load tasks, falling back to the on-disk snapshot when Google Sheets can't be read"""
     try:
-        gc = get_gsheet_client()
-        task_sheet = gc.open("Task-management").worksheet("tasks")
-        tasks = task_sheet.get_all_records()
-        expected_columns = ["id", "title", "description", "assigned_to", "created_by", "status", "timestamp", "deadline"]
-        for task in tasks:
-            for col in expected_columns:
-                if col not in task:
-                    task[col] = ''
-        return tasks
+        return fetch_tasks()
     except Exception as e:
+        handle_sheet_error(e)
+        snapshot = load_tasks_snapshot()
+        if snapshot is not None:
+            st.warning(f"Showing the last saved copy of tasks; could not reach Google Sheets: {e}")
+            return snapshot
         st.error(f"Error loading tasks: {e}")
         return []
 
+def load_all():
+    """Load tasks and users, falling back to the tasks snapshot and a separate users read"""
+    try:
+        return fetch_all()
+    except Exception as e:
+        handle_sheet_error(e)
+        try:
+            users = load_users()
+        except Exception as users_error:
+            handle_sheet_error(users_error)
+            users = []
+        snapshot = load_tasks_snapshot()
+        if snapshot is not None:
+            st.warning(f"Showing the last saved copy of tasks; could not reach Google Sheets: {e}")
+            return snapshot, users
+        st.error(f"Error loading data: {e}")
+        return [], users
+
+def clear_tasks_cache():
+    """Invalidate cached task data after task writes, leaving users cached"""
+    fetch_tasks.clear()
+    fetch_all.clear()
+
+def clear_users_cache():
+    """Invalidate cached user data after user writes, leaving tasks cached"""
+    load_users.clear()
+    users_by_name.clear()
+    fetch_all.clear()
+
+def get_task_row_index(task_sheet):
+    """Map column names and task ids to sheet positions from the header row and id column only"""
+    header_range, id_range = retry_api(task_sheet.batch_get)(["1:1", "A2:A"])
+    header = header_range[0] if header_range else []
+    header_map = {col: i + 1 for i, col in enumerate(header)}
+    task_id_to_row = {row[0]: i + 2 for i, row in enumerate(id_range) if len(row) > 0}
+    return header_map, task_id_to_row
+
+def group_row_runs(rows):
+    """Collapse row numbers into contiguous (first, last) runs, bottom-most run first"""
+    runs = []
+    for row in sorted(set(rows), reverse=True):
+        if runs and runs[-1][0] == row + 1:
+            runs[-1][0] = row
+        else:
+            runs.append([row, row])
+    return [tuple(run) for run in runs]
+
+def string_cells(values):
+    """Wrap plain values as RAW string cells for a spreadsheets.batchUpdate row"""
+    return {"values": [{"userEnteredValue": {"stringValue": str(value)}} for value in values]}
+
 def apply_pending_changes():
     """Applies all pending changes from session_state to Google Sheet."""
+    if not has_pending_changes():
+        return True
     try:
-        gc = get_gsheet_client()
-        task_sheet = gc.open("Task-management").worksheet("tasks")
-
-        # 1. Process Additions
-        if st.session_state["pending_task_additions"]:
-            rows_to_add = []
-            for task_data in st.session_state["pending_task_additions"]:
-                rows_to_add.append([
-                    task_data['id'],
-                    task_data['title'],
-                    task_data['description'],
-                    task_data['assigned_to'],
-                    task_data['created_by'],
-                    task_data['status'],
-                    task_data['timestamp'],
-                    task_data['deadline']
-                ])
+        task_sheet, _ = get_worksheets()
+        sheet_id = task_sheet.id
+
+        # Resolve row numbers once; updates don't shift rows and deletions run bottom-up,
+        # so a single fresh index serves both phases
+        header_map, task_id_to_row = {}, {}
+        if st.session_state["pending_task_updates"] or st.session_state["pending_task_deletions"]:
+            header_map, task_id_to_row = get_task_row_index(task_sheet)
+
+        # Requests in one batchUpdate apply in order and atomically:
+        # cell updates first, then deletions bottom-up, then appended rows
+        requests = []
+
+        # 1. Process Updates
+        updates_count = 0
+        for task_id, updates in st.session_state["pending_task_updates"].items():
+            if task_id in task_id_to_row and task_id not in st.session_state["pending_task_deletions"]:
+                row_num = task_id_to_row[task_id]
+                for col_name, new_value in updates.items():
+                    col_index = header_map.get(col_name)
+                    if col_index:
+                        requests.append({"updateCells": {
+                            "start": {"sheetId": sheet_id, "rowIndex": row_num - 1, "columnIndex": col_index - 1},
+                            "rows": [string_cells([new_value])],
+                            "fields": "userEnteredValue"
+                        }})
+                        updates_count += 1
+
+        # 2. Process Deletions
+        rows_to_delete_actual = [
+            task_id_to_row[task_id]
+            for task_id in st.session_state["pending_task_deletions"]
+            if task_id in task_id_to_row
+        ]
+        for first_row, last_row in group_row_runs(rows_to_delete_actual):
+            requests.append({"deleteDimension": {"range": {
+                "sheetId": sheet_id,
+                "dimension": "ROWS",
+                "startIndex": first_row - 1,
+                "endIndex": last_row
+            }}})
+
+        # 3. Process Additions
+        rows_to_add = st.session_state["pending_task_additions"]
+        if rows_to_add:
+            requests.append({"appendCells": {
+                "sheetId": sheet_id,
+                "rows": [string_cells(row) for row in rows_to_add],
+                "fields": "userEnteredValue"
+            }})
+
+        if requests:
             try:
-                task_sheet.append_rows(rows_to_add)
-                st.success(f"Added {len(rows_to_add)} new task(s) to the sheet.")
+                # Row deletions and appends are not idempotent, so only retry when rate limited
+                retry_api(get_spreadsheet().batch_update, status_codes=(429,))({"requests": requests})
             except Exception as e:
-                st.error(f"Error adding new tasks: {e}")
+                handle_sheet_error(e)
+                st.error(f"Error saving changes: {e}")
                 return False
-            st.session_state["pending_task_additions"] = []
-
-        # 2. Process Deletions (do before updates to avoid conflicts)
-        if st.session_state["pending_task_deletions"]:
-            current_tasks = task_sheet.get_all_values()
-            if len(current_tasks) > 1:  # Check if there are data rows
-                header = current_tasks[0]
-                data_rows = current_tasks[1:]
-                
-                task_id_to_row = {row[0]: i + 2 for i, row in enumerate(data_rows) if len(row) > 0}
-
-                rows_to_delete_actual = []
-                for task_id in st.session_state["pending_task_deletions"]:
-                    if task_id in task_id_to_row:
-                        rows_to_delete_actual.append(task_id_to_row[task_id])
-                
-                # Sort in reverse order to delete from bottom to top
-                rows_to_delete_actual.sort(reverse=True)
-
-                for row_num in rows_to_delete_actual:
-                    try:
-                        task_sheet.delete_rows(row_num)
-                        st.success(f"Deleted task at row {row_num}.")
-                    except Exception as e:
-                        st.error(f"Error deleting task at row {row_num}: {e}")
-                        return False
-            st.session_state["pending_task_deletions"] = []
-
-        # 3. Process Updates
-        if st.session_state["pending_task_updates"]:
-            current_tasks_for_update = task_sheet.get_all_values()
-            if len(current_tasks_for_update) > 1:  # Check if there are data rows
-                header_map = {col: i + 1 for i, col in enumerate(current_tasks_for_update[0])}
-                task_id_to_actual_row = {row[0]: i + 2 for i, row in enumerate(current_tasks_for_update[1:]) if len(row) > 0}
-
-                updates_performed = 0
-                for task_id, updates in st.session_state["pending_task_updates"].items():
-                    if task_id in task_id_to_actual_row:
-                        row_num = task_id_to_actual_row[task_id]
-                        for col_name, new_value in updates.items():
-                            col_index = header_map.get(col_name)
-                            if col_index:
-                                try:
-                                    task_sheet.update_cell(row_num, col_index, new_value)
-                                    updates_performed += 1
-                                except Exception as e:
-                                    st.error(f"Error updating task {task_id}, column {col_name}: {e}")
-                                    return False
-                if updates_performed > 0:
-                    st.success(f"Applied {updates_performed} task update(s).")
-            st.session_state["pending_task_updates"] = {}
-
-        st.cache_data.clear()
+            st.toast(
+                f"Saved {updates_count} update(s), {len(rows_to_delete_actual)} deletion(s) "
+                f"and {len(rows_to_add)} new task(s).",
+                icon="✅"
+            )
+
+        st.session_state["pending_task_updates"] = {}
+        st.session_state["pending_task_deletions"] = set()
+        st.session_state["pending_task_additions"] = []
+        st.session_state["logout_save_failed"] = False
+        clear_tasks_cache()
         return True
     except Exception as e:
+        handle_sheet_error(e)
         st.error(f"Error applying changes: {e}")
         return False
 
+def hash_password(password):
+    """Hash a password with salted PBKDF2-HMAC-SHA256, stored as 'salt$hash'"""
+    salt = os.urandom(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, PASSWORD_HASH_ITERATIONS)
+    return f"{salt.hex()}${digest.hex()}"
+
+def parse_password_hash(stored_password):
+    """Split a stored 'salt$hash' value into bytes, or return None for a legacy plaintext password"""
+    salt_hex, sep, digest_hex = stored_password.partition("$")
+    # Only the exact shape hash_password() writes (16-byte salt, SHA-256 digest) counts as a hash,
+    # so a plaintext password that merely looks like 'hex$hex' still logs in
+    if not sep or len(salt_hex) != 32 or len(digest_hex) != 64:
+        return None
+    try:
+        salt, digest = bytes.fromhex(salt_hex), bytes.fromhex(digest_hex)
+    except ValueError:
+        return None
+    # fromhex skips whitespace, so also check the decoded lengths
+    return (salt, digest) if len(salt) == 16 and len(digest) == 32 else None
+
+def check_password(password, stored_password):
+    """Compare a password against a stored 'salt$hash' value in constant time"""
+    parsed = parse_password_hash(stored_password)
+    if parsed is None:
+        # Accounts created before hashing was introduced store the password as-is
+        return hmac.compare_digest(stored_password.encode(), password.encode())
+    salt, expected = parsed
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, PASSWORD_HASH_ITERATIONS)
+    return hmac.compare_digest(digest, expected)
+
+def find_user_row(user_sheet, username):
+    """Read the users sheet fresh and return (header, row number of username)
+
+    With duplicate usernames the last row wins, matching users_by_name(); the row is None if absent.
+    """
+    values = retry_api(user_sheet.get_all_values)()
+    header = values[0] if values else []
+    if "username" not in header:
+        return header, None
+    username_col = header.index("username")
+    user_row = None
+    for row_num, row in enumerate(values[1:], start=2):
+        if username_col < len(row) and row[username_col] == username:
+            user_row = row_num
+    return header, user_row
+
+def upgrade_password_hash(username, password):
+    """Replace a legacy plaintext password in the users sheet with its hash"""
+    _, user_sheet = get_worksheets()
+    header, user_row = find_user_row(user_sheet, username)
+    if user_row is None or "password" not in header:
+        return
+    retry_api(user_sheet.update_cell)(user_row, header.index("password") + 1, hash_password(password))
+    clear_users_cache()
+
 def verify_user_credentials(username, password):
     """Verify user credentials against Google Sheets"""
-    users = load_users()
-    existing_user = next((user for user in users if user.get('username') == username), None)
-
-    if existing_user:
-        stored_password = existing_user.get('password', '')
-        return stored_password == password, "existing", existing_user.get('role')
-    else:
+    existing_user = users_by_name().get(username)
+    if existing_user is None:
         return True, "new", None
 
+    stored_password = existing_user.get('password', '')
+    return check_password(password, stored_password), "existing", existing_user.get('role')
+
 def ensure_user(username, role, password):
     """Add new user or verify existing user credentials"""
     try:
         is_valid, user_status, existing_role = verify_user_credentials(username, password)
 
         if user_status == "new":
-            gc = get_gsheet_client()
-            user_sheet = gc.open("Task-management").worksheet("users")
-            user_sheet.append_row([username, role, password])
-            st.cache_data.clear()
-            return True, "New user created successfully", role
-        elif user_status == "existing":
+            _, user_sheet = get_worksheets()
+            # The cached user list can be stale (e.g. written by another server instance);
+            # re-check the sheet so an existing account is never shadowed by a duplicate row
+            _, user_row = find_user_row(user_sheet, username)
+            if user_row is None:
+                retry_api(user_sheet.append_row, status_codes=(429,))([username, role, hash_password(password)])
+                clear_users_cache()
+                return True, "New user created successfully", role
+            clear_users_cache()
+            is_valid, user_status, existing_role = verify_user_credentials(username, password)
+
+        if user_status == "existing":
             if not is_valid:
                 return False, "Invalid username or password", None
             if existing_role != role:
                 return False, f"User '{username}' exists with role '{existing_role}'. Please select the correct role.", None
+            if parse_password_hash(users_by_name().get(username, {}).get('password', '')) is None:
+                try:
+                    upgrade_password_hash(username, password)
+                except Exception as e:
+                    handle_sheet_error(e)
             return True, "Login successful", existing_role
         else:
             return False, "Invalid credentials or unknown user status", None
 
     except Exception as e:
+        handle_sheet_error(e)
         return False, f"Error managing user: {e}", None
 
 # --- Helper functions to mark changes in session state ---
+def generate_task_id():
+    """Generate a random 12-hex-character task id (48 bits, unlike the old 32-bit truncated UUIDs)"""
+    return secrets.token_hex(6)
+
+def add_pending_tasks(title, desc, assignees, created_by, deadline):
+    """Add one task per assignee to pending additions, stored as rows in TASK_COLUMNS order"""
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
+    st.session_state["pending_task_additions"].extend(
+        [generate_task_id(), title, desc, assignee, created_by, 'Pending', timestamp, deadline]
+        for assignee in assignees
+    )
+    st.toast(f"{len(assignees)} new task(s) added to pending changes. Click 'Save Changes' to commit.", icon="📝")
+
 def add_pending_task(title, desc, assigned_to, created_by, deadline):
     """Add a task to pending additions"""
-    new_task_id = str(uuid.uuid4())[:8]
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
-    st.session_state["pending_task_additions"].append({
-        'id': new_task_id,
-        'title': title,
-        'description': desc,
-        'assigned_to': assigned_to,
-        'created_by': created_by,
-        'status': 'Pending',
-        'timestamp': timestamp,
-        'deadline': deadline
-    })
-    st.info("New task added to pending changes. Click 'Save Changes' to commit.")
-
-def update_pending_task(task_id, column_name, new_value):
-    """Update a task in pending updates"""
-    if task_id not in st.session_state["pending_task_updates"]:
-        st.session_state["pending_task_updates"][task_id] = {}
-    st.session_state["pending_task_updates"][task_id][column_name] = new_value
+    add_pending_tasks(title, desc, [assigned_to], created_by, deadline)
+
+def update_pending_task(task_id, column_name, new_value, original_value):
+    """Record a widget value in pending updates, dropping it again once it matches the saved value"""
+    pending_updates = st.session_state["pending_task_updates"]
+    task_updates = pending_updates.get(task_id, {})
+    if new_value == original_value:
+        # Reverted (or never changed): nothing to save for this cell
+        if column_name in task_updates:
+            del task_updates[column_name]
+            if not task_updates:
+                del pending_updates[task_id]
+        return
+    if task_updates.get(column_name) == new_value:
+        return
+    pending_updates.setdefault(task_id, {})[column_name] = new_value
     st.info("Change marked as pending. Click 'Save Changes' to commit.")
 
 def delete_pending_task(task_id):
     """Mark a task for deletion"""
-    if task_id not in st.session_state["pending_task_deletions"]:
-        st.session_state["pending_task_deletions"].append(task_id)
-    st.warning(f"Task {task_id} marked for deletion. Click 'Save Changes' to commit.")
+    st.session_state["pending_task_deletions"].add(task_id)
+    st.toast(f"Task {task_id} marked for deletion. Click 'Save Changes' to commit.", icon="⚠️")
+
+def has_pending_changes():
+    """Check whether any task changes are waiting to be saved"""
+    return bool(
+        st.session_state["pending_task_additions"] or
+        st.session_state["pending_task_updates"] or
+        st.session_state["pending_task_deletions"]
+    )
 
 def clear_coordinator_form():
     """Clear coordinator form fields"""
@@ -276,49 +538,121 @@ def login():
             if success:
                 st.session_state["username"] = username
                 st.session_state["role"] = user_role
-                st.sidebar.success(message)
+                st.toast(message, icon="✅")
                 st.rerun()
             else:
                 st.sidebar.error(f"Login failed: {message}")
         else:
             st.sidebar.error("Please enter both username and password")
 
-def get_task_sort_key(task):
-    """Get sort key for tasks"""
-    deadline_val = task.get('deadline', '')
+def index_tasks(tasks):
+    """Group tasks by status and by assignee in a single pass"""
+    tasks_by_status = defaultdict(list)
+    tasks_by_assignee = defaultdict(list)
+    for task in tasks:
+        tasks_by_status[task.get("status")].append(task)
+        tasks_by_assignee[task.get("assigned_to")].append(task)
+    return tasks_by_status, tasks_by_assignee
+
+@lru_cache(maxsize=4096)
+def parse_task_datetime(value):
+    """Parse a 'YYYY-MM-DD HH:MM' sheet value, returning None if empty or malformed"""
+    if not value:
+        return None
     try:
-        deadline_dt = datetime.strptime(deadline_val, "%Y-%m-%d %H:%M") if deadline_val else datetime.max
+        # fromisoformat reads 'YYYY-MM-DD HH:MM' directly and is far cheaper than strptime
+        parsed = datetime.fromisoformat(value)
     except (ValueError, TypeError):
-        deadline_dt = datetime.max
-    
+        return None
+    # Offsets like 'Z' would make it timezone-aware and uncomparable with naive values
+    return parsed if parsed.tzinfo is None else None
+
+def apply_pending_overlay(tasks):
+    """Drop tasks pending deletion and show pending edits; only edited tasks are copied"""
+    pending_updates = st.session_state["pending_task_updates"]
+    pending_deletions = st.session_state["pending_task_deletions"]
+    display_tasks = []
+    for task in tasks:
+        if task['id'] in pending_deletions:
+            continue
+        updates = pending_updates.get(task['id'])
+        display_tasks.append({**task, **updates} if updates else task)
+    return display_tasks
+
+def paginate_tasks(tasks, key):
+    """Show a page selector and return (offset, tasks on the selected page)"""
+    page_count = max(1, (len(tasks) + TASKS_PER_PAGE - 1) // TASKS_PER_PAGE)
+    if page_count == 1:
+        return 0, tasks
+    # Keyed on the page count so a shrinking result set resets to page 1 instead of going out of range
+    page = st.number_input(f"Page (1-{page_count})", min_value=1, max_value=page_count, value=1, step=1, key=f"{key}_{page_count}")
+    offset = (page - 1) * TASKS_PER_PAGE
+    return offset, tasks[offset:offset + TASKS_PER_PAGE]
+
+def get_task_sort_key(task):
+    """Get sort key for tasks"""
+    deadline_dt = parse_task_datetime(task.get('deadline', '')) or datetime.max
     status_order = 0 if task.get('status') == 'Pending' else 1
-    
-    timestamp_val = task.get('timestamp', '')
-    try:
-        timestamp_dt = datetime.strptime(timestamp_val, "%Y-%m-%d %H:%M") if timestamp_val else datetime.min
-    except (ValueError, TypeError):
-        timestamp_dt = datetime.min
-    
+    timestamp_dt = parse_task_datetime(task.get('timestamp', '')) or datetime.min
     return (deadline_dt, status_order, timestamp_dt)
 
+@st.fragment
+def render_coordinator_task(task, i, original_task, now):
+    """Render one coordinator task card; widget changes rerun only this card"""
+    had_pending_changes = has_pending_changes()
+    with st.container(border=True):
+        # One markdown element per static block; blank lines keep the paragraphs separate
+        st.markdown(f"**{task.get('title', 'N/A')}**\n\n📄 {task.get('description', 'N/A')}")
+
+        current_status_display = task.get('status', 'Pending')
+        new_status = st.radio(
+            "Status:",
+            ["Pending", "Done"],
+            index=0 if current_status_display == "Pending" else 1,
+            key=f"status_radio_{task.get('id')}_{i}",
+            horizontal=True
+        )
+
+        original_status = original_task.get('status', 'Pending') if original_task else 'Pending'
+
+        update_pending_task(task["id"], "status", new_status, original_status)
+
+        deadline_val = task.get('deadline', '')
+        if deadline_val:
+            deadline_dt = parse_task_datetime(deadline_val)
+            if deadline_dt is None:
+                deadline_line = "📅 Deadline: Invalid Date Format"
+            elif deadline_dt < now:
+                deadline_line = f"🚨 **Deadline: {deadline_val} (OVERDUE!)**"
+            else:
+                deadline_line = f"📅 Deadline: {deadline_val}"
+        else:
+            deadline_line = "📅 **No Deadline**"
+
+        st.markdown(f"{deadline_line}\n\nCreated by: **{task.get('created_by', 'N/A')}** | Created On: {task.get('timestamp', 'N/A')}")
+
+    # The sidebar shows Save only while something is pending
+    if had_pending_changes != has_pending_changes():
+        st.rerun()
+
 def coordinator_view():
     """Coordinator dashboard"""
     st.title("📋 Coordinator Dashboard")
     username = st.session_state["username"]
 
     all_tasks = load_tasks()
+    tasks_by_id = {t['id']: t for t in all_tasks}
     my_tasks = [t for t in all_tasks if t.get("assigned_to") == username]
 
     # Statistics
+    status_counts = Counter(t.get("status") for t in my_tasks)
     col1, col2, col3 = st.columns(3)
     with col1:
         st.metric("Total Tasks", len(my_tasks))
     with col2:
-        pending_count = len([t for t in my_tasks if t.get("status") == "Pending"])
-        st.metric("Pending", pending_count)
+        st.metric("Pending", status_counts["Pending"])
     with col3:
-        done_count = len([t for t in my_tasks if t.get("status") == "Done"])
-        st.metric("Completed", done_count)
+        st.metric("Completed", status_counts["Done"])
 
     st.markdown("---")
 
@@ -363,76 +697,119 @@ def coordinator_view():
 
         filtered_tasks = my_tasks if status_filter == "All" else [t for t in my_tasks if t.get("status") == status_filter]
 
-        # Apply pending changes to display
-        display_tasks = []
-        for task in filtered_tasks:
-            if task['id'] not in st.session_state["pending_task_deletions"]:
-                display_task = task.copy()
-                if display_task['id'] in st.session_state["pending_task_updates"]:
-                    for col, val in st.session_state["pending_task_updates"][display_task['id']].items():
-                        display_task[col] = val
-                display_tasks.append(display_task)
+        display_tasks = apply_pending_overlay(filtered_tasks)
 
         display_tasks.sort(key=get_task_sort_key)
 
-        for i, task in enumerate(display_tasks):
-            with st.container(border=True):
-                st.markdown(f"**{task.get('title', 'N/A')}**")
-                st.markdown(f"📄 {task.get('description', 'N/A')}")
-
-                current_status_display = task.get('status', 'Pending')
-                new_status = st.radio(
-                    "Status:",
-                    ["Pending", "Done"],
-                    index=0 if current_status_display == "Pending" else 1,
-                    key=f"status_radio_{task.get('id')}_{i}",
-                    horizontal=True
+        offset, page_tasks = paginate_tasks(display_tasks, "coord_task_page")
+        now = datetime.now()
+        for i, task in enumerate(page_tasks, start=offset):
+            render_coordinator_task(task, i, tasks_by_id.get(task['id']), now)
+
+@st.fragment
+def render_head_task(task, i, original_task, assignee_options, assignee_positions, now):
+    """Render one editable task card for the Head dashboard; widget changes rerun only this card"""
+    had_pending_changes = has_pending_changes()
+    with st.container(border=True):
+        st.markdown(f"**Task: {task.get('title', 'N/A')}** (ID: {task.get('id', 'N/A')})\n\n📄 Description: {task.get('description', 'N/A')}")
+
+        # Task Actions
+        col_status, col_assignee, col_deadline_edit = st.columns([1, 1.5, 2])
+
+        with col_status:
+            current_status = task.get('status', 'Pending')
+            new_status = st.radio(
+                f"Status for {task.get('id')}:",
+                ["Pending", "Done"],
+                index=0 if current_status == "Pending" else 1,
+                key=f"status_radio_{task.get('id')}_{i}",
+                horizontal=True
+            )
+
+            original_status = original_task.get('status', 'Pending') if original_task else 'Pending'
+
+            update_pending_task(task["id"], "status", new_status, original_status)
+
+        with col_assignee:
+            current_assignee = task.get('assigned_to', 'Unassigned')
+            if assignee_positions:
+                default_index = assignee_positions.get(current_assignee, len(assignee_options) - 1)  # Default to "Unassigned"
+
+                new_assignee = st.selectbox(
+                    f"Assignee for {task.get('id')}:",
+                    assignee_options,
+                    index=default_index,
+                    key=f"assignee_select_{task.get('id')}_{i}"
                 )
-                
-                # Find original status from all_tasks
-                original_task = next((t for t in all_tasks if t['id'] == task['id']), None)
-                original_status = original_task.get('status', 'Pending') if original_task else 'Pending'
-                
-                if new_status != original_status:
-                    update_pending_task(task["id"], "status", new_status)
-
-                deadline_val = task.get('deadline', '')
-                if deadline_val:
-                    try:
-                        deadline_dt = datetime.strptime(deadline_val, "%Y-%m-%d %H:%M")
-                        if deadline_dt < datetime.now():
-                            st.markdown(f"🚨 **Deadline: {deadline_val} (OVERDUE!)**")
-                        else:
-                            st.markdown(f"📅 Deadline: {deadline_val}")
-                    except (ValueError, TypeError):
-                        st.markdown(f"📅 Deadline: Invalid Date Format")
+
+                original_assignee = original_task.get('assigned_to', 'Unassigned') if original_task else 'Unassigned'
+
+                update_pending_task(task["id"], "assigned_to", new_assignee, original_assignee)
+            else:
+                st.text(f"Assigned to: {current_assignee}")
+                st.info("No coordinators available.")
+
+        with col_deadline_edit:
+            deadline_val = task.get('deadline', '')
+            current_deadline_date = None
+            current_deadline_time = None
+
+            if deadline_val:
+                current_deadline_dt = parse_task_datetime(deadline_val)
+                if current_deadline_dt is None:
+                    st.markdown(f"📅 Current Deadline: Invalid Format")
                 else:
-                    st.markdown("📅 **No Deadline**")
+                    current_deadline_date = current_deadline_dt.date()
+                    current_deadline_time = current_deadline_dt.time()
+                    if current_deadline_dt < now:
+                        st.markdown(f"🚨 **Current Deadline: {deadline_val} (OVERDUE!)**")
+                    else:
+                        st.markdown(f"📅 Current Deadline: {deadline_val}")
+            else:
+                st.markdown("📅 **Current Deadline: No Deadline**")
+
+            new_deadline_date = st.date_input("Date:", value=current_deadline_date, key=f"deadline_date_edit_{task.get('id')}_{i}", help="Leave empty for no deadline")
+            new_deadline_time = st.time_input("Time:", value=current_deadline_time, key=f"deadline_time_edit_{task.get('id')}_{i}", help="Leave empty for no deadline")
+
+            new_deadline_str = ""
+            if new_deadline_date and new_deadline_time:
+                new_deadline_str = f"{new_deadline_date.strftime('%Y-%m-%d')} {new_deadline_time.strftime('%H:%M')}"
+            elif new_deadline_date:
+                new_deadline_str = f"{new_deadline_date.strftime('%Y-%m-%d')} 23:59"
+
+            original_deadline_val = original_task.get('deadline', '') if original_task else ''
 
-                st.markdown(f"Created by: **{task.get('created_by', 'N/A')}** | Created On: {task.get('timestamp', 'N/A')}")
+            update_pending_task(task["id"], "deadline", new_deadline_str, original_deadline_val)
+
+        st.markdown("---")
+        if st.button(f"🗑️ Delete Task {task.get('id')}", key=f"delete_btn_{task.get('id')}_{i}", type="secondary"):
+            delete_pending_task(task["id"])
+            st.rerun()
+
+    # The sidebar shows Save only while something is pending
+    if had_pending_changes != has_pending_changes():
+        st.rerun()
 
 def head_view():
     """Head dashboard - Consolidated View with single save button"""
     st.title("👤 Head Dashboard")
     username = st.session_state["username"]
 
-    all_tasks = load_tasks()
-    users = load_users()
+    all_tasks, users = load_all()
+    tasks_by_id = {t['id']: t for t in all_tasks}
     coordinators = [u["username"] for u in users if u.get("role") == "Coordinator"]
 
     # Statistics
+    tasks_by_status, tasks_by_assignee = index_tasks(all_tasks)
     col1, col2, col3, col4 = st.columns(4)
     with col1:
         st.metric("Total Tasks", len(all_tasks))
     with col2:
-        pending_count = len([t for t in all_tasks if t.get("status") == "Pending"])
-        st.metric("Pending", pending_count)
+        st.metric("Pending", len(tasks_by_status["Pending"]))
     with col3:
-        done_count = len([t for t in all_tasks if t.get("status") == "Done"])
-        st.metric("Completed", done_count)
+        st.metric("Completed", len(tasks_by_status["Done"]))
     with col4:
-        unassigned_count = len([t for t in all_tasks if t.get("assigned_to") == "Unassigned"])
-        st.metric("Unassigned", unassigned_count)
+        st.metric("Unassigned", len(tasks_by_assignee["Unassigned"]))
 
     st.markdown("---")
 
@@ -464,8 +841,7 @@ def head_view():
 
         if st.form_submit_button("Add Task(s) to Pending Changes"):
             if title.strip() and desc.strip() and assignees:
-                for assignee in assignees:
-                    add_pending_task(title, desc, assignee, username, deadline_str_create)
+                add_pending_tasks(title, desc, assignees, username, deadline_str_create)
                 clear_head_form()
                 st.rerun()
             else:
@@ -483,146 +859,36 @@ def head_view():
     with col_filter_assignee:
         assignee_filter = st.selectbox("Filter by Assignee", ["All"] + coordinators + ["Unassigned"], key="head_assignee_filter_display")
 
-    filtered_tasks = all_tasks
-    if status_filter != "All":
+    if status_filter == "All":
+        filtered_tasks = tasks_by_assignee[assignee_filter] if assignee_filter != "All" else all_tasks
+    else:
         if status_filter == "Unassigned":
-            filtered_tasks = [t for t in filtered_tasks if t.get("assigned_to") == "Unassigned"]
+            filtered_tasks = tasks_by_assignee["Unassigned"]
         else:
-            filtered_tasks = [t for t in filtered_tasks if t.get("status") == status_filter]
+            filtered_tasks = tasks_by_status[status_filter]
 
-    if assignee_filter != "All":
-        filtered_tasks = [t for t in filtered_tasks if t.get("assigned_to") == assignee_filter]
+        if assignee_filter != "All":
+            filtered_tasks = [t for t in filtered_tasks if t.get("assigned_to") == assignee_filter]
 
-    # Apply pending changes to display
-    display_tasks = []
-    for task in filtered_tasks:
-        if task['id'] not in st.session_state["pending_task_deletions"]:
-            display_task = task.copy()
-            if display_task['id'] in st.session_state["pending_task_updates"]:
-                for col, val in st.session_state["pending_task_updates"][display_task['id']].items():
-                    display_task[col] = val
-            display_tasks.append(display_task)
+    display_tasks = apply_pending_overlay(filtered_tasks)
 
     display_tasks.sort(key=get_task_sort_key)
 
     if not display_tasks:
         st.info("No tasks match the current filters.")
     else:
-        for i, task in enumerate(display_tasks):
-            with st.container(border=True):
-                st.markdown(f"**Task: {task.get('title', 'N/A')}** (ID: {task.get('id', 'N/A')})")
-                st.markdown(f"📄 Description: {task.get('description', 'N/A')}")
-
-                # Task Actions
-                col_status, col_assignee, col_deadline_edit = st.columns([1, 1.5, 2])
-
-                with col_status:
-                    current_status = task.get('status', 'Pending')
-                    new_status = st.radio(
-                        f"Status for {task.get('id')}:",
-                        ["Pending", "Done"],
-                        index=0 if current_status == "Pending" else 1,
-                        key=f"status_radio_{task.get('id')}_{i}",
-                        horizontal=True
-                    )
-                    
-                    # Find original status from all_tasks
-                    original_task = next((t for t in all_tasks if t['id'] == task['id']), None)
-                    original_status = original_task.get('status', 'Pending') if original_task else 'Pending'
-                    
-                    if new_status != original_status:
-                        update_pending_task(task["id"], "status", new_status)
-
-                with col_assignee:
-                    current_assignee = task.get('assigned_to', 'Unassigned')
-                    if coordinators:
-                        assignee_options = coordinators + ["Unassigned"]
-                        try:
-                            default_index = assignee_options.index(current_assignee)
-                        except ValueError:
-                            default_index = len(assignee_options) - 1  # Default to "Unassigned"
-                        
-                        new_assignee = st.selectbox(
-                            f"Assignee for {task.get('id')}:",
-                            assignee_options,
-                            index=default_index,
-                            key=f"assignee_select_{task.get('id')}_{i}"
-                        )
-                        
-                        # Find original assignee from all_tasks
-                        original_task = next((t for t in all_tasks if t['id'] == task['id']), None)
-                        original_assignee = original_task.get('assigned_to', 'Unassigned') if original_task else 'Unassigned'
-                        
-                        if new_assignee != original_assignee:
-                            update_pending_task(task["id"], "assigned_to", new_assignee)
-                    else:
-                        st.text(f"Assigned to: {current_assignee}")
-                        st.info("No coordinators available.")
-
-                with col_deadline_edit:
-                    deadline_val = task.get('deadline', '')
-                    current_deadline_date = None
-                    current_deadline_time = None
-
-                    if deadline_val:
-                        try:
-                            current_deadline_dt = datetime.strptime(deadline_val, "%Y-%m-%d %H:%M")
-                            current_deadline_date = current_deadline_dt.date()
-                            current_deadline_time = current_deadline_dt.time()
-                            if current_deadline_dt < datetime.now():
-                                st.markdown(f"🚨 **Current Deadline: {deadline_val} (OVERDUE!)**")
-                            else:
-                                st.markdown(f"📅 Current Deadline: {deadline_val}")
-                        except (ValueError, TypeError):
-                            st.markdown(f"📅 Current Deadline: Invalid Format")
-                    else:
-                        st.markdown("📅 **Current Deadline: No Deadline**")
-
-                    new_deadline_date = st.date_input("Date:", value=current_deadline_date, key=f"deadline_date_edit_{task.get('id')}_{i}", help="Leave empty for no deadline")
-                    new_deadline_time = st.time_input("Time:", value=current_deadline_time, key=f"deadline_time_edit_{task.get('id')}_{i}", help="Leave empty for no deadline")
-
-                    new_deadline_str = ""
-                    if new_deadline_date and new_deadline_time:
-                        new_deadline_str = f"{new_deadline_date.strftime('%Y-%m-%d')} {new_deadline_time.strftime('%H:%M')}"
-                    elif new_deadline_date:
-                        new_deadline_str = f"{new_deadline_date.strftime('%Y-%m-%d')} 23:59"
-
-                    # Find original deadline from all_tasks
-                    original_task = next((t for t in all_tasks if t['id'] == task['id']), None)
-                    original_deadline_val = original_task.get('deadline', '') if original_task else ''
-                    
-                    if new_deadline_str != original_deadline_val:
-                        update_pending_task(task["id"], "deadline", new_deadline_str)
-
-                st.markdown("---")
-                if st.button(f"🗑️ Delete Task {task.get('id')}", key=f"delete_btn_{task.get('id')}_{i}", type="secondary"):
-                    delete_pending_task(task["id"])
-                    st.rerun()
+        # Assignee options and their selectbox positions, built once instead of per card
+        assignee_options = coordinators + ["Unassigned"] if coordinators else []
+        assignee_positions = {name: pos for pos, name in enumerate(assignee_options)}
+        offset, page_tasks = paginate_tasks(display_tasks, "head_task_page")
+        now = datetime.now()
+        for i, task in enumerate(page_tasks, start=offset):
+            render_head_task(task, i, tasks_by_id.get(task['id']), assignee_options, assignee_positions, now)
 
 def main():
     """Main application entry point"""
-    # Custom CSS for styling
-    st.markdown("""
-    <style>
-    .stContainer > div {
-        border: 1px solid #e0e0e0;
-        border-radius: 10px;
-        padding: 15px;
-        margin: 10px 0;
-        background-color: #fafafa;
-    }
-    .stButton > button {
-        width: 100%;
-    }
-    div[data-baseweb="radio"] {
-        flex-direction: row;
-        gap: 1rem;
-    }
-    div[data-baseweb="radio"] > label {
-        margin-right: 10px;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    # Custom CSS for styling (re-emitted each run; Streamlit drops elements a run doesn't render)
+    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
     if st.session_state["username"] is None:
         st.title("🏢 Task Management System")
@@ -633,27 +899,32 @@ def main():
         st.sidebar.success(f"👤 **{st.session_state['username']}**")
         st.sidebar.info(f"🏷️ Role: {st.session_state['role']}")
 
-        has_pending_changes = bool(
-            st.session_state["pending_task_additions"] or
-            st.session_state["pending_task_updates"] or
-            st.session_state["pending_task_deletions"]
-        )
-
-        if has_pending_changes:
+        if has_pending_changes():
             st.sidebar.warning("⚠️ You have unsaved changes!")
             if st.sidebar.button("💾 Save All Changes", key="save_all_changes_btn", type="primary"):
+                # apply_pending_changes() shows the save summary toast itself
                 if apply_pending_changes():
-                    st.success("All changes saved successfully!")
                     st.rerun()
         else:
             st.sidebar.info("No pending changes.")
             if st.sidebar.button("🔄 Refresh Data", key="refresh_data_btn"):
-                st.cache_data.clear()
+                clear_tasks_cache()
+                clear_users_cache()
                 st.rerun()
 
         if st.sidebar.button("🚪 Logout", key="logout_btn"):
-            st.session_state.clear()
-            st.rerun()
+            # Flush queued changes instead of silently dropping them with the session
+            if not has_pending_changes() or apply_pending_changes():
+                st.session_state.clear()
+                st.rerun()
+            st.session_state["logout_save_failed"] = True
+
+        # If saving keeps failing, don't trap the user in the session
+        if st.session_state["logout_save_failed"] and has_pending_changes():
+            st.sidebar.error("Your changes could not be saved.")
+            if st.sidebar.button("🗑️ Discard Changes & Logout", key="discard_logout_btn"):
+                st.session_state.clear()
+                st.rerun()
 
         if st.session_state["role"] == "Coordinator":
             coordinator_view()